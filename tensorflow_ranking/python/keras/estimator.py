@@ -127,8 +127,20 @@ def model_to_estimator(model,
     keras_metrics += metrics.default_keras_metrics()
     eval_metric_ops = {}
     for keras_metric in keras_metrics:
-      keras_metric.update_state(labels, logits, sample_weight=weights)
-      eval_metric_ops[keras_metric.name] = keras_metric
+      update_op = keras_metric.update_state(
+          labels, logits, sample_weight=weights)
+      result = keras_metric.result()
+      if isinstance(result, dict):
+        # A metric with a dict result is reported as one metric per key. Its
+        # variables are added to `LOCAL_VARIABLES` so that they get initialized
+        # as for the metric objects in `eval_metric_ops`.
+        for variable in keras_metric.variables:
+          tf.compat.v1.add_to_collection(
+              tf.compat.v1.GraphKeys.LOCAL_VARIABLES, variable)
+        for name, value in result.items():
+          eval_metric_ops[name] = (value, update_op)
+      else:
+        eval_metric_ops[keras_metric.name] = keras_metric
 
     train_op = None
     if training:
@@ -20,12 +20,17 @@ that metrics may be stochastic if items with equal scores are provided.
 WARNING: Some metrics (e.g. Recall or MRR) are not well-defined when there are
 no relevant items (e.g. if `y_true` has a row of only zeroes). For these cases,
 the TF-Ranking metrics will evaluate to `0`.
+
+NOTE: Floating point predictions, e.g. `tf.float16` or `tf.bfloat16` outputs of
+a mixed precision model, are ranked in their own dtype. Labels, weights and the
+accumulated metric values use the `dtype` of the metric.
 """
 
 from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import math
 from typing import Any, Dict, List, Optional
 import tensorflow.compat.v2 as tf
 
@@ -94,6 +99,8 @@ def get(key: str,
 
   Returns:
     A tf.keras.metrics.Metric. See `_RankingMetric` signature for more details.
+    Metrics hold the state of their updates, so a new metric object is returned
+    for each call.
 
   Raises:
     ValueError: If key is unsupported.
@@ -101,31 +108,15 @@ def get(key: str,
   if not isinstance(key, str):
     raise ValueError("Input `key` needs to be string.")
 
-  key_to_cls = {
-      RankingMetricKey.MRR: MRRMetric,
-      RankingMetricKey.ARP: ARPMetric,
-      RankingMetricKey.PRECISION: PrecisionMetric,
-      RankingMetricKey.MAP: MeanAveragePrecisionMetric,
-      RankingMetricKey.NDCG: NDCGMetric,
-      RankingMetricKey.DCG: DCGMetric,
-      RankingMetricKey.ORDERED_PAIR_ACCURACY: OPAMetric,
-      RankingMetricKey.HITS: HitsMetric,
-  }
-
-  metric_kwargs = {"name": name, "dtype": dtype}
-  if topn:
-    metric_kwargs.update({"topn": topn})
-
-  if kwargs:
-    metric_kwargs.update(kwargs)
-
-  if key in key_to_cls:
-    metric_cls = key_to_cls[key]
-    metric_obj = metric_cls(**metric_kwargs)
-  else:
+  metric_cls = _KEY_TO_CLS.get(key)
+  if metric_cls is None:
     raise ValueError("Unsupported metric: {}".format(key))
 
-  return metric_obj
+  metric_kwargs = {"name": name, "dtype": dtype, **kwargs}
+  # Metrics without a cutoff, e.g. ARP or OPA, do not accept `topn`.
+  if topn:
+    metric_kwargs["topn"] = topn
+  return metric_cls(**metric_kwargs)
 
 
 def default_keras_metrics(**kwargs) -> List[tf.keras.metrics.Metric]:
@@ -135,38 +126,348 @@ def default_keras_metrics(**kwargs) -> List[tf.keras.metrics.Metric]:
     **kwargs: Additional kwargs to pass to each keras metric.
 
   Returns:
-    A list of metrics of type `tf.keras.metrics.Metric`.
+    A list of metrics of type `tf.keras.metrics.Metric`. The metrics are packed
+    into a single metric whose result maps the metric names, e.g.
+    "metric/ndcg_1", to their values.
   """
+  # The most expensive metrics are skipped in the training steps of `fit()` if
+  # `TrainingModeCallback` is used.
+  eval_kwargs = {"compute_on_train": False, **kwargs}
   list_kwargs = [
-      dict(key="ndcg", topn=topn, name="metric/ndcg_{}".format(topn), **kwargs)
-      for topn in [1, 3, 5, 10]
-  ] + [
       dict(key="arp", name="metric/arp", **kwargs),
       dict(key="ordered_pair_accuracy", name="metric/ordered_pair_accuracy",
            **kwargs),
       dict(key="mrr", name="metric/mrr", **kwargs),
       dict(key="precision", name="metric/precision", **kwargs),
-      dict(key="map", name="metric/map", **kwargs),
-      dict(key="dcg", name="metric/dcg", **kwargs),
-      dict(key="ndcg", name="metric/ndcg", **kwargs)
+      dict(key="map", name="metric/map", **eval_kwargs),
+      dict(key="dcg", name="metric/dcg", **eval_kwargs),
+  ]
+  # NDCG@{1,3,5,10} and NDCG of the whole list, reported as "metric/ndcg_1",
+  # ..., "metric/ndcg", share a single metric.
+  metrics = [
+      MultiCutoffNDCGMetric(
+          name="metric/ndcg", topns=[1, 3, 5, 10, None], **eval_kwargs)
+  ] + [get(**kwargs) for kwargs in list_kwargs]
+  return [
+      _PackedRankingMetricBundle(
+          metrics, name="metric", dtype=kwargs.get("dtype"))
   ]
-  return [get(**kwargs) for kwargs in list_kwargs]
 
 
-class _RankingMetric(tf.keras.metrics.Mean):
+class TrainingModeCallback(tf.keras.callbacks.Callback):
+  """Skips the updates of ranking metrics in the training steps of `fit`.
+
+  Ranking metrics constructed with `compute_on_train=False`, e.g. the NDCG, DCG
+  and MAP metrics of `default_keras_metrics()`, are then only updated in
+  evaluation, including the validation of `Model.fit`.
+
+  NOTE: The metrics decide whether to update when Keras traces the train and
+  test functions. The callback needs to be passed to the first `fit()` call
+  after `compile()`.
+
+  NOTE: A skipped metric is not a value of 0. The metrics of
+  `default_keras_metrics()` that are skipped are left out of the training logs,
+  e.g. there is a "val_metric/ndcg" but no "metric/ndcg" in the `fit` history.
+  Other ranking metrics constructed with `compute_on_train=False` still report
+  their value in the training logs, which is always 0, and only their
+  validation values are meaningful.
+
+  Example usage:
+
+  ```python
+  metrics = tfr.keras.metrics.default_keras_metrics()
+  model.compile(optimizer='sgd', loss=loss, metrics=metrics)
+  model.fit(dataset, validation_data=validation_dataset,
+            callbacks=[tfr.keras.metrics.TrainingModeCallback(metrics)])
+  ```
+  """
+
+  def __init__(self, metrics: List[tf.keras.metrics.Metric]):
+    """Constructor.
+
+    Args:
+      metrics: A list of the TF-Ranking metrics passed to `compile()`, e.g. as
+        returned by `default_keras_metrics()`.
+    """
+    super(TrainingModeCallback, self).__init__()
+    self._ranking_metrics = list(metrics)
+    self._in_fit = False
+
+  def _set_training(self, training):
+    for metric in self._ranking_metrics:
+      metric._training = training  # pylint: disable=protected-access
+
+  def on_train_begin(self, logs=None):
+    self._in_fit = True
+    self._set_training(True)
+
+  def on_train_end(self, logs=None):
+    self._in_fit = False
+    self._set_training(False)
+
+  def on_test_begin(self, logs=None):
+    self._set_training(False)
+
+  def on_test_end(self, logs=None):
+    self._set_training(self._in_fit)
+
+
+class _SortCoordinator(object):
+  """Shares the sorting of `y_pred` among ranking metrics.
+
+  Metrics constructed with the same coordinator and updated with the same
+  `y_true`, `y_pred` and `sample_weight` tensors, as it is the case for metrics
+  passed to `compile()`, reuse the sorted indices computed by the first of them
+  instead of sorting the items again.
+  """
+
+  def __init__(self, topn=None):
+    """Constructor.
+
+    Args:
+      topn: An optional cutoff of the sorted items, at least the largest cutoff
+        of the metrics of the coordinator. All items are sorted if None.
+    """
+    self._topn = topn
+    self._inputs = None
+    self._sorted_indices = None
+
+  def sorted_indices(self, inputs, sorted_indices_fn):
+    """Returns the sorted indices for the inputs of a metric update.
+
+    Args:
+      inputs: A tuple of `y_true`, `y_pred` and `sample_weight` as passed to
+        `update_state`.
+      sorted_indices_fn: A function computing the sorted indices of `inputs`
+        given a cutoff.
+
+    Returns:
+      An int `Tensor` with the indices of the items sorted by `y_pred`, or None
+      if the inputs are not tensors and can not be shared.
+    """
+    if not all(
+        isinstance(t, (tf.Tensor, tf.RaggedTensor)) or t is None
+        for t in inputs):
+      return None
+    if self._inputs is None or any(
+        t is not cached_t for t, cached_t in zip(inputs, self._inputs)):
+      self._sorted_indices = sorted_indices_fn(self._topn)
+      self._inputs = inputs
+    return self._sorted_indices
+
+
+def _reset_variables(variables: List[tf.Variable]):
+  """Assigns zeros to `variables` of any shape.
+
+  `tf.keras.metrics.Metric.reset_state` assigns a scalar zero to each variable,
+  which fails for the vector accumulators of metrics with several values.
+
+  Args:
+    variables: The variables of a metric.
+  """
+  for variable in variables:
+    variable.assign(tf.zeros(variable.shape, dtype=variable.dtype))
+
+
+def _signed_integer_label_dtype(label_dtype: Any) -> Optional[tf.DType]:
+  """Returns `label_dtype` as a `tf.DType`, or None if it is not set.
+
+  Args:
+    label_dtype: An optional signed integer dtype of the labels.
+
+  Raises:
+    ValueError: If `label_dtype` is not a signed integer dtype. Invalid items
+      are marked with a label of `-1`, which an unsigned dtype cannot hold.
+  """
+  if not label_dtype:
+    return None
+  label_dtype = tf.as_dtype(label_dtype)
+  if not label_dtype.is_integer or label_dtype.is_unsigned:
+    raise ValueError(
+        "`label_dtype` needs to be a signed integer dtype, got: {}".format(
+            label_dtype.name))
+  return label_dtype
+
+
+def _eager_device(tensor: Any) -> Optional[str]:
+  """Returns the device of an eager `tensor`, or None if it is unknown."""
+  if not tf.executing_eagerly() or not isinstance(tensor, tf.Tensor):
+    return None
+  return tensor.device or None
+
+
+def _maybe_fast_gain_fn(gain_fn: utils.GainFunction,
+                        max_label: Optional[int] = None,
+                        integer_labels: bool = False) -> utils.GainFunction:
+  """Returns a cheaper equivalent of the default `gain_fn` for integer labels.
+
+  Args:
+    gain_fn: The gain function of the metric.
+    max_label: An optional int as the largest label value. Labels need to be
+      integers in [0, max_label] to look up the gains from a table.
+    integer_labels: A bool indicating whether the labels are small non-negative
+      integers, for which `2**label - 1` is computed with a bit shift. Ignored
+      if `max_label` is set.
+
+  Returns:
+    A gain function equivalent to `gain_fn` on the supported labels.
+  """
+  if gain_fn is not utils.pow_minus_1:
+    return gain_fn
+  if max_label is not None:
+    table = [2.**label - 1. for label in range(max_label + 1)]
+
+    def tabulated_gain_fn(label):
+      gains = tf.constant(table, dtype=label.dtype)
+      return tf.gather(gains, tf.cast(label, tf.int32))
+
+    return tabulated_gain_fn
+  if integer_labels:
+
+    def integer_gain_fn(label):
+      gains = tf.bitwise.left_shift(
+          tf.ones_like(label, dtype=tf.int32), tf.cast(label, tf.int32)) - 1
+      return tf.cast(gains, label.dtype)
+
+    return integer_gain_fn
+  return gain_fn
+
+
+def _maybe_tabulate_rank_discount_fn(
+    rank_discount_fn: utils.RankDiscountFunction,
+    topn: Optional[int] = None) -> utils.RankDiscountFunction:
+  """Returns a table lookup for the default `rank_discount_fn` given a cutoff.
+
+  Args:
+    rank_discount_fn: The rank discount function of the metric.
+    topn: An optional cutoff. Only ranks in [1, topn] are discounted.
+
+  Returns:
+    A rank discount function equivalent to `rank_discount_fn` on the ranks
+    considered by the metric.
+  """
+  if rank_discount_fn is not utils.log2_inverse or not topn:
+    return rank_discount_fn
+  table = [math.log(2.) / math.log1p(rank) for rank in range(1, topn + 1)]
+
+  def tabulated_rank_discount_fn(rank):
+    discounts = tf.constant(table, dtype=rank.dtype)
+    return tf.gather(discounts, tf.cast(rank, tf.int32) - 1)
+
+  return tabulated_rank_discount_fn
+
+
+class _RankingMetric(tf.keras.metrics.Metric):
   """Implements base ranking metric class.
 
-  Please see tf.keras.metrics.Mean for more information about such a class and
+  The metric is the weighted mean of the per-list metric values, as computed by
+  tf.keras.metrics.Mean. Please see tf.keras.metrics.Mean for more information
+  about such a class and
   https://www.tensorflow.org/tutorials/distribute/custom_training on how to do
   customized training.
   """
 
-  def __init__(self, name=None, dtype=None, ragged=False, **kwargs):
+  def __init__(self,
+               name=None,
+               dtype=None,
+               ragged=False,
+               jit_compile=False,
+               sort_coordinator=None,
+               compute_on_train=True,
+               num_values=None,
+               **kwargs):
+    """Constructor.
+
+    Args:
+      name: A string used as the name for this metric.
+      dtype: Data type of the metric output. See `tf.keras.metrics.Metric`.
+      ragged: A bool indicating whether the supplied tensors are ragged. If
+        True y_true, y_pred and sample_weight (if providing per-example weights)
+        need to be ragged tensors with compatible shapes.
+      jit_compile: A bool indicating whether to compile the per-list metric
+        computation with XLA. Only supported for dense inputs. In eager mode,
+        the compiled computation runs on the device of `y_pred`.
+      sort_coordinator: An optional `_SortCoordinator` to share the sorting of
+        `y_pred` with other metrics updated on the same inputs. All metrics of
+        a coordinator need to have the same `ragged`.
+      compute_on_train: A bool indicating whether to update the metric in the
+        training steps of `Model.fit`. If False, the updates are skipped when
+        `TrainingModeCallback` marks the metric as training.
+      num_values: The number of values of the per-list metric if it has several,
+        which share their per-list weights. `total` is then a vector.
+      **kwargs: Other keyward arguments used in `tf.keras.metrics.Metric`.
+    """
     super(_RankingMetric, self).__init__(name=name, dtype=dtype, **kwargs)
+    # The weighted sum of the per-list metric values and the sum of the weights,
+    # named as the variables of tf.keras.metrics.Mean.
+    self.total = self.add_weight(
+        "total",
+        shape=[] if num_values is None else [num_values],
+        initializer="zeros")
+    self.count = self.add_weight("count", initializer="zeros")
     # An instance of `metrics_impl._RankingMetric`.
     # Overwrite this in subclasses.
     self._metric = None
     self._ragged = ragged
+    self._jit_compile = jit_compile
+    self._sort_coordinator = sort_coordinator
+    self._compute_fn = None
+    # The dtype `y_true` is cast to. Metrics that support integer labels
+    # overwrite this, and the labels are cast to `dtype` otherwise.
+    self._label_dtype = None
+    self._compute_on_train = compute_on_train
+    # Set by `TrainingModeCallback` while `Model.fit` runs the training steps.
+    self._training = False
+    # The cutoff of the metric, if any. Overwrite this in subclasses.
+    self._topn = None
+
+  def _compute(self, y_true, y_pred, sample_weight=None, sorted_indices=None):
+    """Returns the per-list metric values and weights of `self._metric`."""
+    if not self._jit_compile:
+      # Keras already traces the update into the train and test functions, so
+      # the computation is only wrapped in its own function to compile it.
+      return self._metric.compute(
+          y_true, y_pred, sample_weight, sorted_indices=sorted_indices)
+    if self._compute_fn is None:
+      # With `reduce_retracing`, inputs of different batch and list sizes share
+      # a concrete function instead of tracing `compute` again for each shape.
+      self._compute_fn = tf.function(
+          self._metric.compute, jit_compile=True, reduce_retracing=True)
+    if sample_weight is not None and not isinstance(sample_weight,
+                                                    tf.RaggedTensor):
+      # Python values are part of the trace, so weights are passed as tensors.
+      sample_weight = tf.convert_to_tensor(sample_weight)
+    device = _eager_device(y_pred)
+    if device:
+      # The XLA computation is compiled for a single device, so it is placed with
+      # the predictions (e.g. on the GPU of the model) instead of on the default
+      # device, which would copy the inputs there first.
+      with tf.device(device):
+        return self._compute_fn(
+            y_true, y_pred, sample_weight, sorted_indices=sorted_indices)
+    return self._compute_fn(
+        y_true, y_pred, sample_weight, sorted_indices=sorted_indices)
+
+  def _per_list_values(self, y_true, y_pred, sample_weight=None):
+    """Returns the per-list metric values and weights of the inputs."""
+    inputs = (y_true, y_pred, sample_weight)
+    y_true = tf.cast(y_true, self._label_dtype or self._dtype)
+    # Predictions are only used to rank the items, so floating point predictions
+    # are kept in their own precision instead of being cast to `self._dtype`.
+    if (not isinstance(y_pred, (tf.Tensor, tf.RaggedTensor)) or
+        not y_pred.dtype.is_floating):
+      y_pred = tf.cast(y_pred, self._dtype)
+
+    def sorted_indices_fn(topn):
+      return self._metric.sorted_indices(
+          y_true, y_pred, sample_weight, topn=topn)
+
+    sorted_indices = None
+    if self._sort_coordinator is not None:
+      sorted_indices = self._sort_coordinator.sorted_indices(
+          inputs, sorted_indices_fn)
+    # TODO: Add mask argument for metric.compute() call
+    return self._compute(y_true, y_pred, sample_weight, sorted_indices)
 
   def update_state(self, y_true, y_pred, sample_weight=None):
     """Accumulates metric statistics.
@@ -183,23 +484,176 @@ class _RankingMetric(tf.keras.metrics.Mean):
     Returns:
       Update op.
     """
-    y_true = tf.cast(y_true, self._dtype)
-    y_pred = tf.cast(y_pred, self._dtype)
-
-    # TODO: Add mask argument for metric.compute() call
-    per_list_metric_val, per_list_metric_weights = self._metric.compute(
+    if self._skips_update():
+      return tf.identity(self.count)
+    per_list_metric_val, per_list_metric_weights = self._per_list_values(
         y_true, y_pred, sample_weight)
-    return super(_RankingMetric, self).update_state(
-        per_list_metric_val, sample_weight=per_list_metric_weights)
+    per_list_metric_val = tf.cast(per_list_metric_val, self._dtype)
+    per_list_metric_weights = tf.cast(per_list_metric_weights, self._dtype)
+    # The per-list values are reduced right away instead of through
+    # tf.keras.metrics.Mean.update_state, which weights them once more. As in
+    # `Mean`, a tensor is returned since `tf.function` does not return ops.
+    update_total_op = self.total.assign_add(
+        tf.reduce_sum(per_list_metric_val * per_list_metric_weights))
+    with tf.control_dependencies([update_total_op]):
+      return self.count.assign_add(tf.reduce_sum(per_list_metric_weights))
+
+  def result(self):
+    return tf.math.divide_no_nan(self.total, self.count)
+
+  def _result_names(self):
+    """Returns the names of the values of the per-list metric, in order."""
+    return [self.name]
+
+  def _sorted_topn(self):
+    """Returns how many of the top sorted items are used by the metric.
+
+    Returns:
+      An int cutoff, None if the metric uses all sorted items, or 0 if the
+      metric does not use the sorting of `y_pred`.
+    """
+    return self._topn
+
+  def _skips_update(self):
+    """Returns whether to skip the update as the metric is training."""
+    # This is a Python check, so it holds for the train and test functions as
+    # they are traced by Keras.
+    return self._training and not self._compute_on_train
 
   def get_config(self):
     config = super(_RankingMetric, self).get_config()
     config.update({
         "ragged": self._ragged,
+        "jit_compile": self._jit_compile,
+        "compute_on_train": self._compute_on_train,
     })
     return config
 
 
+@tf.keras.utils.register_keras_serializable(package="tensorflow_ranking")
+class _PackedRankingMetricBundle(tf.keras.metrics.Metric):
+  """Packs the accumulators of several ranking metrics into two vectors.
+
+  The weighted sums of the per-list values and the sums of the weights of all
+  metrics are held by a `totals` and a `counts` vector, so that a distributed
+  evaluation reduces two variables instead of a pair per metric. The metrics
+  also share the sorting of `y_pred`. The result is a dict from the name of
+  each metric value to the value.
+  """
+
+  def __init__(self, metrics, name=None, dtype=None, **kwargs):
+    """Constructor.
+
+    Args:
+      metrics: A list of `_RankingMetric`s with the same `ragged`. Only their
+        per-list metric computation is used.
+      name: A string used as the name for this metric.
+      dtype: Data type of the metric output. See `tf.keras.metrics.Metric`.
+      **kwargs: Other keyward arguments used in `tf.keras.metrics.Metric`.
+    """
+    super(_PackedRankingMetricBundle, self).__init__(
+        name=name, dtype=dtype, **kwargs)
+    self._set_ranking_metrics(metrics)
+    # Set by `TrainingModeCallback` while `Model.fit` runs the training steps.
+    self._training = False
+    # pylint: disable=protected-access
+    self._names = [
+        name for metric in self._ranking_metrics
+        for name in metric._result_names()
+    ]
+    # The metrics share a sort of the top items used by any of them.
+    shared_metrics = [
+        metric for metric in self._ranking_metrics
+        if metric._sort_coordinator is None
+    ]
+    topns = [metric._sorted_topn() for metric in shared_metrics]
+    sort_coordinator = _SortCoordinator(
+        topn=None if None in topns else max(topns, default=0))
+    for metric in shared_metrics:
+      metric._sort_coordinator = sort_coordinator
+    # pylint: enable=protected-access
+    self.totals = self.add_weight(
+        "totals", shape=[len(self._names)], initializer="zeros")
+    self.counts = self.add_weight(
+        "counts", shape=[len(self._names)], initializer="zeros")
+
+  @tf.__internal__.tracking.no_automatic_dependency_tracking
+  def _set_ranking_metrics(self, metrics):
+    # The metrics are not tracked as layers of the bundle, so that their own
+    # unused accumulators are not among its variables, which are checkpointed
+    # and reset.
+    self._ranking_metrics = list(metrics)
+
+  def update_state(self, y_true, y_pred, sample_weight=None):
+    """Accumulates the statistics of all metrics.
+
+    See `_RankingMetric.update_state`.
+    """
+    totals, counts = [], []
+    # pylint: disable=protected-access
+    for metric in self._ranking_metrics:
+      if self._skips_update(metric):
+        # The accumulators of skipped metrics are left unchanged.
+        num_values = len(metric._result_names())
+        totals.append(tf.zeros([num_values], dtype=self._dtype))
+        counts.append(tf.zeros([num_values], dtype=self._dtype))
+        continue
+      per_list_val, per_list_weights = metric._per_list_values(
+          y_true, y_pred, sample_weight)
+      per_list_val = tf.cast(per_list_val, self._dtype)
+      per_list_weights = tf.cast(per_list_weights, self._dtype)
+      totals.append(tf.reduce_sum(per_list_val * per_list_weights, axis=0))
+      counts.append(
+          tf.reduce_sum(
+              tf.ones_like(per_list_val) * per_list_weights, axis=0))
+    # pylint: enable=protected-access
+    update_totals_op = self.totals.assign_add(tf.concat(totals, axis=0))
+    with tf.control_dependencies([update_totals_op]):
+      return self.counts.assign_add(tf.concat(counts, axis=0))
+
+  def result(self):
+    values = tf.math.divide_no_nan(self.totals, self.counts)
+    results = {}
+    index = 0
+    # pylint: disable=protected-access
+    for metric in self._ranking_metrics:
+      names = metric._result_names()
+      # Skipped metrics are left out instead of being reported as 0.
+      if not self._skips_update(metric):
+        for offset, name in enumerate(names):
+          results[name] = values[index + offset]
+      index += len(names)
+    # pylint: enable=protected-access
+    return results
+
+  def _skips_update(self, metric):
+    """Returns whether to skip the update of `metric` as it is training."""
+    # pylint: disable=protected-access
+    return self._training and not metric._compute_on_train
+
+  def reset_state(self):
+    _reset_variables(self.variables)
+
+  def get_config(self):
+    config = super(_PackedRankingMetricBundle, self).get_config()
+    config.update({
+        "metrics": [
+            tf.keras.utils.serialize_keras_object(metric)
+            for metric in self._ranking_metrics
+        ],
+    })
+    return config
+
+  @classmethod
+  def from_config(cls, config):
+    config = dict(config)
+    config["metrics"] = [
+        tf.keras.utils.deserialize_keras_object(metric)
+        for metric in config["metrics"]
+    ]
+    return cls(**config)
+
+
 @tf.keras.utils.register_keras_serializable(package="tensorflow_ranking")
 class MRRMetric(_RankingMetric):
   r"""Mean reciprocal rank (MRR).
@@ -213,6 +667,11 @@ class MRRMetric(_RankingMetric):
   NOTE: This metric converts graded relevance to binary relevance by setting
   `y_i = 1` if `y_i >= 1`.
 
+  NOTE: Labels are only compared to integers, so `label_dtype` can be set to a
+  narrow signed integer dtype, e.g. `tf.int8`, to keep the labels in that
+  dtype. Unsigned dtypes are not supported, as invalid items are marked with a
+  label of `-1`. The labels need to be integers in the range of `label_dtype`.
+
   Standalone usage:
 
   >>> y_true = [[0., 1., 1.]]
@@ -251,16 +710,24 @@ class MRRMetric(_RankingMetric):
   $$
   """
 
-  def __init__(self, name=None, topn=None, dtype=None, ragged=False, **kwargs):
+  def __init__(self,
+               name=None,
+               topn=None,
+               dtype=None,
+               ragged=False,
+               label_dtype=None,
+               **kwargs):
     super(MRRMetric, self).__init__(name=name, dtype=dtype, ragged=ragged,
                                     **kwargs)
     self._topn = topn
+    self._label_dtype = _signed_integer_label_dtype(label_dtype)
     self._metric = metrics_impl.MRRMetric(name=name, topn=topn, ragged=ragged)
 
   def get_config(self):
     config = super(MRRMetric, self).get_config()
     config.update({
         "topn": self._topn,
+        "label_dtype": self._label_dtype.name if self._label_dtype else None,
     })
     return config
 
@@ -392,6 +859,11 @@ class PrecisionMetric(_RankingMetric):
   NOTE: This metric converts graded relevance to binary relevance by setting
   `y_i = 1` if `y_i >= 1`.
 
+  NOTE: Labels are only compared to integers, so `label_dtype` can be set to a
+  narrow signed integer dtype, e.g. `tf.int8`, to keep the labels in that
+  dtype. Unsigned dtypes are not supported, as invalid items are marked with a
+  label of `-1`. The labels need to be integers in the range of `label_dtype`.
+
   Standalone usage:
 
   >>> y_true = [[0., 1., 1.]]
@@ -439,10 +911,17 @@ class PrecisionMetric(_RankingMetric):
   * $k = |y|$ if $k$ is not provided
   """
 
-  def __init__(self, name=None, topn=None, dtype=None, ragged=False, **kwargs):
+  def __init__(self,
+               name=None,
+               topn=None,
+               dtype=None,
+               ragged=False,
+               label_dtype=None,
+               **kwargs):
     super(PrecisionMetric, self).__init__(name=name, dtype=dtype, ragged=ragged,
                                           **kwargs)
     self._topn = topn
+    self._label_dtype = _signed_integer_label_dtype(label_dtype)
     self._metric = metrics_impl.PrecisionMetric(name=name, topn=topn,
                                                 ragged=ragged)
 
@@ -450,6 +929,7 @@ class PrecisionMetric(_RankingMetric):
     config = super(PrecisionMetric, self).get_config()
     config.update({
         "topn": self._topn,
+        "label_dtype": self._label_dtype.name if self._label_dtype else None,
     })
     return config
 
@@ -617,6 +1097,10 @@ class PrecisionIAMetric(_RankingMetric):
     self._metric = metrics_impl.PrecisionIAMetric(name=name, topn=topn,
                                                   ragged=ragged)
 
+  def _sorted_topn(self):
+    # The diversity metric sorts its subtopic labels itself.
+    return 0
+
   def get_config(self):
     config = super(PrecisionIAMetric, self).get_config()
     config.update({
@@ -724,6 +1208,14 @@ class NDCGMetric(_RankingMetric):
   Please see `tfr.keras.utils.pow_minus_1` and `tfr.keras.utils.log2_inverse` as
   examples when defining user customized functions.
 
+  NOTE: If the labels are integers in `[0, max_label]`, `max_label` can be set
+  so that the default `gain_fn` is looked up from a table. Otherwise, if the
+  labels are small non-negative integers, `integer_labels=True` computes the
+  default `gain_fn` with a bit shift. Similarly, the default `rank_discount_fn`
+  is looked up from a table when `topn` is set. With `max_label` and the default
+  `gain_fn`, the ideal DCG of lists whose items have the same weight is also
+  computed from the number of items of each label instead of a second sort.
+
   Standalone usage:
 
   >>> y_true = [[0., 1., 1.]]
@@ -772,18 +1264,25 @@ class NDCGMetric(_RankingMetric):
                rank_discount_fn=None,
                dtype=None,
                ragged=False,
+               max_label=None,
+               integer_labels=False,
                **kwargs):
     super(NDCGMetric, self).__init__(name=name, dtype=dtype, ragged=ragged,
                                      **kwargs)
     self._topn = topn
     self._gain_fn = gain_fn or utils.pow_minus_1
     self._rank_discount_fn = rank_discount_fn or utils.log2_inverse
+    self._max_label = max_label
+    self._integer_labels = integer_labels
     self._metric = metrics_impl.NDCGMetric(
         name=name,
         topn=topn,
-        gain_fn=self._gain_fn,
-        rank_discount_fn=self._rank_discount_fn,
-        ragged=ragged)
+        gain_fn=_maybe_fast_gain_fn(self._gain_fn, max_label, integer_labels),
+        rank_discount_fn=_maybe_tabulate_rank_discount_fn(
+            self._rank_discount_fn, topn),
+        ragged=ragged,
+        # The ideal DCG from label counts requires a non-decreasing gain.
+        max_label=max_label if self._gain_fn is utils.pow_minus_1 else None)
 
   def get_config(self):
     base_config = super(NDCGMetric, self).get_config()
@@ -791,6 +1290,120 @@ class NDCGMetric(_RankingMetric):
         "topn": self._topn,
         "gain_fn": self._gain_fn,
         "rank_discount_fn": self._rank_discount_fn,
+        "max_label": self._max_label,
+        "integer_labels": self._integer_labels,
+    }
+    config.update(base_config)
+    return config
+
+
+@tf.keras.utils.register_keras_serializable(package="tensorflow_ranking")
+class MultiCutoffNDCGMetric(_RankingMetric):
+  r"""Normalized discounted cumulative gain (NDCG) at multiple cutoffs.
+
+  Computes `tfr.keras.metrics.NDCGMetric` at each cutoff in `topns` from a
+  single sort of `y_pred` and of the ideal ranking. A cutoff of `None` stands
+  for the whole list.
+
+  The result is a dict that maps `"{name}_{topn}"` to NDCG@topn, and `name` to
+  the NDCG of the whole list.
+
+  Standalone usage:
+
+  >>> y_true = [[0., 1., 1.]]
+  >>> y_pred = [[3., 1., 2.]]
+  >>> ndcg = tfr.keras.metrics.MultiCutoffNDCGMetric(name="ndcg",
+  ...                                                topns=[1, 2, None])
+  >>> _ = ndcg.update_state(y_true, y_pred)
+  >>> {k: round(float(v), 4) for k, v in ndcg.result().items()}
+  {'ndcg_1': 0.0, 'ndcg_2': 0.3869, 'ndcg': 0.6934}
+
+  Usage with the `compile()` API:
+
+  ```python
+  model.compile(optimizer='sgd',
+                metrics=[tfr.keras.metrics.MultiCutoffNDCGMetric(
+                    topns=[1, 5, 10])])
+  ```
+
+  See `tfr.keras.metrics.NDCGMetric` for the definition.
+  """
+
+  def __init__(self,
+               name=None,
+               topns=(1, 3, 5, 10),
+               gain_fn=None,
+               rank_discount_fn=None,
+               dtype=None,
+               ragged=False,
+               max_label=None,
+               integer_labels=False,
+               **kwargs):
+    topns = list(topns)
+    # The weights are the same for all cutoffs, so only the weighted NDCGs are
+    # accumulated per-cutoff, in the `total` vector.
+    super(MultiCutoffNDCGMetric, self).__init__(
+        name=name,
+        dtype=dtype,
+        ragged=ragged,
+        num_values=len(topns),
+        **kwargs)
+    self._topns = topns
+    self._gain_fn = gain_fn or utils.pow_minus_1
+    self._rank_discount_fn = rank_discount_fn or utils.log2_inverse
+    self._max_label = max_label
+    self._integer_labels = integer_labels
+    max_topn = None if None in self._topns else max(self._topns)
+    self._metric = metrics_impl.MultiCutoffNDCGMetric(
+        name=name,
+        topns=self._topns,
+        gain_fn=_maybe_fast_gain_fn(self._gain_fn, max_label, integer_labels),
+        rank_discount_fn=_maybe_tabulate_rank_discount_fn(
+            self._rank_discount_fn, max_topn),
+        ragged=ragged)
+
+  def update_state(self, y_true, y_pred, sample_weight=None):
+    """Accumulates metric statistics.
+
+    See `_RankingMetric.update_state`.
+    """
+    if self._skips_update():
+      return tf.identity(self.count)
+    per_list_ndcg, per_list_weights = self._per_list_values(
+        y_true, y_pred, sample_weight)
+    per_list_ndcg = tf.cast(per_list_ndcg, self._dtype)
+    per_list_weights = tf.cast(per_list_weights, self._dtype)
+    update_total_op = self.total.assign_add(
+        tf.reduce_sum(per_list_ndcg * per_list_weights, axis=0))
+    with tf.control_dependencies([update_total_op]):
+      return self.count.assign_add(tf.reduce_sum(per_list_weights))
+
+  def result(self):
+    return {
+        key: tf.math.divide_no_nan(self.total[i], self.count)
+        for i, key in enumerate(self._result_names())
+    }
+
+  def reset_state(self):
+    _reset_variables(self.variables)
+
+  def _result_names(self):
+    return [
+        self.name if topn is None else "{}_{}".format(self.name, topn)
+        for topn in self._topns
+    ]
+
+  def _sorted_topn(self):
+    return None if None in self._topns else max(self._topns)
+
+  def get_config(self):
+    base_config = super(MultiCutoffNDCGMetric, self).get_config()
+    config = {
+        "topns": self._topns,
+        "gain_fn": self._gain_fn,
+        "rank_discount_fn": self._rank_discount_fn,
+        "max_label": self._max_label,
+        "integer_labels": self._integer_labels,
     }
     config.update(base_config)
     return config
@@ -812,6 +1425,12 @@ class DCGMetric(_RankingMetric):
   Please see `tfr.keras.utils.pow_minus_1` and `tfr.keras.utils.log2_inverse` as
   examples when defining user customized functions.
 
+  NOTE: If the labels are integers in `[0, max_label]`, `max_label` can be set
+  so that the default `gain_fn` is looked up from a table. Otherwise, if the
+  labels are small non-negative integers, `integer_labels=True` computes the
+  default `gain_fn` with a bit shift. Similarly, the default `rank_discount_fn`
+  is looked up from a table when `topn` is set.
+
   Standalone usage:
 
   >>> y_true = [[0., 1., 1.]]
@@ -858,17 +1477,22 @@ class DCGMetric(_RankingMetric):
                rank_discount_fn=None,
                dtype=None,
                ragged=False,
+               max_label=None,
+               integer_labels=False,
                **kwargs):
     super(DCGMetric, self).__init__(name=name, dtype=dtype, ragged=ragged,
                                     **kwargs)
     self._topn = topn
     self._gain_fn = gain_fn or utils.pow_minus_1
     self._rank_discount_fn = rank_discount_fn or utils.log2_inverse
+    self._max_label = max_label
+    self._integer_labels = integer_labels
     self._metric = metrics_impl.DCGMetric(
         name=name,
         topn=topn,
-        gain_fn=self._gain_fn,
-        rank_discount_fn=self._rank_discount_fn,
+        gain_fn=_maybe_fast_gain_fn(self._gain_fn, max_label, integer_labels),
+        rank_discount_fn=_maybe_tabulate_rank_discount_fn(
+            self._rank_discount_fn, topn),
         ragged=ragged)
 
   def get_config(self):
@@ -877,6 +1501,8 @@ class DCGMetric(_RankingMetric):
         "topn": self._topn,
         "gain_fn": self._gain_fn,
         "rank_discount_fn": self._rank_discount_fn,
+        "max_label": self._max_label,
+        "integer_labels": self._integer_labels,
     }
     config.update(base_config)
     return config
@@ -994,10 +1620,15 @@ class AlphaDCGMetric(_RankingMetric):
         name=name,
         topn=topn,
         alpha=alpha,
-        rank_discount_fn=self._rank_discount_fn,
+        rank_discount_fn=_maybe_tabulate_rank_discount_fn(
+            self._rank_discount_fn, topn),
         seed=seed,
         ragged=ragged)
 
+  def _sorted_topn(self):
+    # The diversity metric sorts its subtopic labels itself.
+    return 0
+
   def get_config(self):
     config = super(AlphaDCGMetric, self).get_config()
     config.update({
@@ -1022,6 +1653,11 @@ class OPAMetric(_RankingMetric):
   NOTE: Pairs with equal labels (`y_i = y_j`) are always ignored. Pairs with
   equal scores (`s_i = s_j`) are considered incorrectly ordered.
 
+  NOTE: If the labels are integers, e.g. grades, `label_dtype` can be set to a
+  narrow signed integer dtype, e.g. `tf.int8`, to compare the labels in that
+  dtype. Unsigned dtypes are not supported, as invalid items are marked with a
+  label of `-1`. The labels need to be in the range of `label_dtype`.
+
   Standalone usage:
 
   >>> y_true = [[0., 1., 2.]]
@@ -1059,7 +1695,37 @@ class OPAMetric(_RankingMetric):
   $$
   """
 
-  def __init__(self, name=None, dtype=None, ragged=False, **kwargs):
+  def __init__(self,
+               name=None,
+               dtype=None,
+               ragged=False,
+               label_dtype=None,
+               **kwargs):
     super(OPAMetric, self).__init__(name=name, dtype=dtype, ragged=ragged,
                                     **kwargs)
+    self._label_dtype = _signed_integer_label_dtype(label_dtype)
     self._metric = metrics_impl.OPAMetric(name=name, ragged=ragged)
+
+  def _sorted_topn(self):
+    # The metric compares all pairs of items instead of sorting.
+    return 0
+
+  def get_config(self):
+    config = super(OPAMetric, self).get_config()
+    config.update({
+        "label_dtype": self._label_dtype.name if self._label_dtype else None,
+    })
+    return config
+
+
+# Maps the keys of `RankingMetricKey` to the metric classes built by `get`.
+_KEY_TO_CLS = {
+    RankingMetricKey.MRR: MRRMetric,
+    RankingMetricKey.ARP: ARPMetric,
+    RankingMetricKey.PRECISION: PrecisionMetric,
+    RankingMetricKey.MAP: MeanAveragePrecisionMetric,
+    RankingMetricKey.NDCG: NDCGMetric,
+    RankingMetricKey.DCG: DCGMetric,
+    RankingMetricKey.ORDERED_PAIR_ACCURACY: OPAMetric,
+    RankingMetricKey.HITS: HitsMetric,
+}
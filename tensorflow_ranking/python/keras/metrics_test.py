@@ -18,6 +18,7 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import functools
 import math
 
 from absl.testing import parameterized
@@ -270,6 +271,13 @@ class MetricsSerializationTest(tf.test.TestCase, parameterized.TestCase):
         'rank_discount_fn': utils.inverse,
     })
 
+  def test_multi_cutoff_normalized_discounted_cumulative_gain(self):
+    self._check_config(metrics_lib.MultiCutoffNDCGMetric, {
+        'topns': [1, 5, None],
+        'gain_fn': utils.identity,
+        'rank_discount_fn': utils.inverse,
+    })
+
   def test_discounted_cumulative_gain(self):
     self._check_config(metrics_lib.DCGMetric, {
         'topn': 1,
@@ -277,6 +285,18 @@ class MetricsSerializationTest(tf.test.TestCase, parameterized.TestCase):
         'rank_discount_fn': utils.inverse,
     })
 
+  def test_discounted_cumulative_gain_with_max_label(self):
+    self._check_config(metrics_lib.DCGMetric, {
+        'topn': 5,
+        'max_label': 4,
+    })
+
+  def test_discounted_cumulative_gain_with_integer_labels(self):
+    self._check_config(metrics_lib.DCGMetric, {
+        'topn': 5,
+        'integer_labels': True,
+    })
+
   def test_alpha_discounted_cumulative_gain(self):
     self._check_config(metrics_lib.AlphaDCGMetric, {
         'topn': 1,
@@ -288,6 +308,9 @@ class MetricsSerializationTest(tf.test.TestCase, parameterized.TestCase):
   def test_ordered_pair_accuracy(self):
     self._check_config(metrics_lib.OPAMetric, {})
 
+  def test_ordered_pair_accuracy_with_label_dtype(self):
+    self._check_config(metrics_lib.OPAMetric, {'label_dtype': tf.int8})
+
 
 class MetricsTest(tf.test.TestCase):
 
@@ -1010,6 +1033,82 @@ class MetricsTest(tf.test.TestCase):
                            (2. * _dcg(2., 1) + 4. * _dcg(1., 2))]) / 5.5
     self.assertAlmostEqual(metric_.result().numpy(), expected_result, places=5)
 
+  def test_normalized_discounted_cumulative_gain_with_max_label(self):
+    scores = [[1., 3., 2.], [1., 2., 3.], [3., 1., 2.]]
+    labels = [[0., 0., 1.], [0., 1., 2.], [3., 0., 1.]]
+    weights = [[1., 2., 3.], [4., 5., 6.], [1., 1., 1.]]
+
+    for topn in [None, 1, 2, 5]:
+      metric_ = metrics_lib.NDCGMetric(topn=topn)
+      tabulated_metric_ = metrics_lib.NDCGMetric(topn=topn, max_label=3)
+      metric_.update_state(labels, scores, weights)
+      tabulated_metric_.update_state(labels, scores, weights)
+      self.assertAlmostEqual(tabulated_metric_.result().numpy(),
+                             metric_.result().numpy(), places=5)
+
+    # Lists with the same weight for all items take the ideal DCG from the
+    # label counts.
+    for sample_weight in [None, [[1.], [2.], [3.]]]:
+      for topn in [None, 1, 2, 5]:
+        metric_ = metrics_lib.NDCGMetric(topn=topn)
+        tabulated_metric_ = metrics_lib.NDCGMetric(topn=topn, max_label=3)
+        metric_.update_state(labels, scores, sample_weight)
+        tabulated_metric_.update_state(labels, scores, sample_weight)
+        self.assertAlmostEqual(tabulated_metric_.result().numpy(),
+                               metric_.result().numpy(), places=5)
+
+  def test_normalized_discounted_cumulative_gain_with_integer_labels(self):
+    scores = [[1., 3., 2.], [1., 2., 3.], [3., 1., 2.]]
+    labels = [[0., 0., 1.], [0., 1., 2.], [3., 0., 1.]]
+    weights = [[1., 2., 3.], [4., 5., 6.], [1., 1., 1.]]
+
+    for topn in [None, 1, 2]:
+      metric_ = metrics_lib.NDCGMetric(topn=topn)
+      integer_metric_ = metrics_lib.NDCGMetric(topn=topn, integer_labels=True)
+      metric_.update_state(labels, scores, weights)
+      integer_metric_.update_state(labels, scores, weights)
+      self.assertAlmostEqual(integer_metric_.result().numpy(),
+                             metric_.result().numpy(), places=5)
+
+  def test_multi_cutoff_normalized_discounted_cumulative_gain(self):
+    scores = [[1., 3., 2.], [1., 2., 3.], [3., 1., 2.]]
+    labels = [[0., 0., 1.], [0., 1., 2.], [0., 0., 0.]]
+    weights = [[1., 2., 3.], [4., 5., 6.], [1., 1., 1.]]
+    topns = [1, 2, 5, None]
+
+    metric_ = metrics_lib.MultiCutoffNDCGMetric(name='ndcg', topns=topns)
+    metric_.update_state(labels, scores, weights)
+    result = metric_.result()
+    self.assertCountEqual(result.keys(),
+                          ['ndcg_1', 'ndcg_2', 'ndcg_5', 'ndcg'])
+    for topn in topns:
+      key = 'ndcg' if topn is None else 'ndcg_{}'.format(topn)
+      ndcg = metrics_lib.NDCGMetric(topn=topn)
+      ndcg.update_state(labels, scores, weights)
+      self.assertAlmostEqual(result[key].numpy(), ndcg.result().numpy(),
+                             places=5)
+
+    metric_.reset_state()
+    for value in metric_.result().values():
+      self.assertEqual(value.numpy(), 0.)
+    # A `total` vector and a `count` accumulate all cutoffs.
+    self.assertLen(metric_.variables, 2)
+
+  def test_multi_cutoff_normalized_discounted_cumulative_gain_with_ragged_inputs(
+      self):
+    scores = tf.ragged.constant([[1., 2., 0.], [1., 2.], [3., 4., 2., 1.]])
+    labels = tf.ragged.constant([[1., 0., 0.], [0., 2.], [2., 0., 1., 0.]])
+
+    metric_ = metrics_lib.MultiCutoffNDCGMetric(
+        name='ndcg', topns=[1, 3], ragged=True)
+    metric_.update_state(labels, scores)
+    result = metric_.result()
+    for topn in [1, 3]:
+      ndcg = metrics_lib.NDCGMetric(topn=topn, ragged=True)
+      ndcg.update_state(labels, scores)
+      self.assertAlmostEqual(result['ndcg_{}'.format(topn)].numpy(),
+                             ndcg.result().numpy(), places=5)
+
   def test_discounted_cumulative_gain(self):
     scores = [[1., 3., 2.], [1., 2., 3.]]
     # Note that scores are ranked in descending order.
@@ -1351,11 +1450,208 @@ class MetricsTest(tf.test.TestCase):
     expected_result = sum([2. * 1., 1. * 1., 3. * 1. / 2.]) / 6.
     self.assertAlmostEqual(metric_.result().numpy(), expected_result, places=5)
 
+  def test_jit_compiled_metrics(self):
+    scores = [[1., 3., 2.], [1., 2., 3.], [3., 1., 2.]]
+    labels = [[0., 0., 1.], [0., 1., 2.], [0., 1., 0.]]
+    weights = [[1., 2., 3.], [4., 5., 6.], [1., 1., 1.]]
+
+    for metric_cls in [metrics_lib.MRRMetric, metrics_lib.NDCGMetric,
+                       metrics_lib.OPAMetric]:
+      metric_ = metric_cls()
+      jit_metric_ = metric_cls(jit_compile=True)
+      metric_.update_state(labels, scores, weights)
+      jit_metric_.update_state(labels, scores, weights)
+      self.assertAlmostEqual(jit_metric_.result().numpy(),
+                             metric_.result().numpy(), places=5)
+
+  def test_metrics_update_state_in_graph_mode(self):
+    with tf.Graph().as_default():
+      scores = tf.constant([[1., 3., 2.], [1., 2., 3.]])
+      labels = tf.constant([[0., 0., 1.], [0., 1., 2.]])
+      metrics = [
+          metrics_lib.NDCGMetric(),
+          metrics_lib.MultiCutoffNDCGMetric(topns=[1, None]),
+      ] + metrics_lib.default_keras_metrics()
+      for metric in metrics:
+        # As for `tf.keras.metrics.Mean`, the update op is a tensor.
+        self.assertIsInstance(metric.update_state(labels, scores), tf.Tensor)
+
+  def test_jit_compiled_metrics_on_device_of_predictions(self):
+    with tf.device('/CPU:0'):
+      scores = tf.constant([[1., 3., 2.], [1., 2., 3.]])
+      labels = tf.constant([[0., 0., 1.], [0., 1., 2.]])
+    self.assertEqual(metrics_lib._eager_device(scores), scores.device)
+    metric_ = metrics_lib.NDCGMetric()
+    jit_metric_ = metrics_lib.NDCGMetric(jit_compile=True)
+    metric_.update_state(labels, scores)
+    jit_metric_.update_state(labels, scores)
+    self.assertAlmostEqual(jit_metric_.result().numpy(),
+                           metric_.result().numpy(), places=5)
+
+  def test_jit_compiled_metrics_do_not_retrace_for_each_list_size(self):
+    metric_ = metrics_lib.NDCGMetric(jit_compile=True)
+    for list_size in range(2, 6):
+      scores = tf.random.uniform([2, list_size])
+      labels = tf.cast(
+          tf.random.uniform([2, list_size], maxval=3, dtype=tf.int32),
+          tf.float32)
+      metric_.update_state(labels, scores)
+    # The first trace is specific to its shapes and the second one generalizes
+    # to all list sizes.
+    self.assertLessEqual(
+        metric_._compute_fn.experimental_get_tracing_count(), 2)
+
+  def test_metrics_with_half_precision_predictions(self):
+    scores = [[1., 3., 2.], [1., 2., 3.], [3., 1., 2.]]
+    labels = [[0., 0., 1.], [0., 1., 2.], [0., 1., 0.]]
+
+    for metric_cls in [metrics_lib.ARPMetric, metrics_lib.NDCGMetric,
+                       metrics_lib.OPAMetric]:
+      for dtype in [tf.float16, tf.bfloat16]:
+        metric_ = metric_cls()
+        half_metric_ = metric_cls()
+        metric_.update_state(labels, scores)
+        half_metric_.update_state(labels, tf.constant(scores, dtype=dtype))
+        self.assertEqual(half_metric_.result().dtype, tf.float32)
+        self.assertAlmostEqual(half_metric_.result().numpy(),
+                               metric_.result().numpy(), places=5)
+
+  def test_metrics_with_integer_labels(self):
+    scores = [[1., 3., 2.], [1., 2., 3.], [3., 1., 2.]]
+    labels = [[0., 0., 1.], [0., 1., 2.], [-1., 2., 0.]]
+    weights = [[1., 2., 3.], [4., 5., 6.], [1., 1., 1.]]
+    ragged_scores = tf.ragged.constant([[1., 2., 0.], [1., 2.], [3., 4., 2.]])
+    ragged_labels = tf.ragged.constant([[1., 0., 0.], [0., 2.], [2., 0., 1.]])
+
+    for metric_cls in [functools.partial(metrics_lib.MRRMetric, topn=2),
+                       functools.partial(metrics_lib.PrecisionMetric, topn=2),
+                       metrics_lib.OPAMetric]:
+      metric_ = metric_cls()
+      int_metric_ = metric_cls(label_dtype=tf.int8)
+      metric_.update_state(labels, scores, weights)
+      int_metric_.update_state(labels, scores, weights)
+      self.assertAlmostEqual(int_metric_.result().numpy(),
+                             metric_.result().numpy(), places=5)
+
+      metric_ = metric_cls(ragged=True)
+      int_metric_ = metric_cls(ragged=True, label_dtype='int16')
+      metric_.update_state(ragged_labels, ragged_scores)
+      int_metric_.update_state(ragged_labels, ragged_scores)
+      self.assertAlmostEqual(int_metric_.result().numpy(),
+                             metric_.result().numpy(), places=5)
+
+      # The `-1` labels of invalid items do not fit an unsigned dtype.
+      for label_dtype in [tf.uint8, tf.float16]:
+        with self.assertRaises(ValueError):
+          metric_cls(label_dtype=label_dtype)
+
   def test_default_keras_metrics(self):
     default_metrics = metrics_lib.default_keras_metrics()
-    self.assertLen(default_metrics, 11)
+    self.assertLen(default_metrics, 1)
+    # Only the `totals` and `counts` vectors of the bundle are accumulated.
+    self.assertLen(default_metrics[0].variables, 2)
     for metric in default_metrics:
       self.assertIsInstance(metric, tf.keras.metrics.Metric)
+    self.assertCountEqual(default_metrics[0].result().keys(), [
+        'metric/ndcg_1', 'metric/ndcg_3', 'metric/ndcg_5', 'metric/ndcg_10',
+        'metric/arp', 'metric/ordered_pair_accuracy', 'metric/mrr',
+        'metric/precision', 'metric/map', 'metric/dcg', 'metric/ndcg'
+    ])
+
+  def test_default_keras_metrics_should_match_independent_metrics(self):
+    scores = tf.constant([[1., 3., 2.], [1., 2., 3.], [3., 1., 2.]])
+    labels = tf.constant([[0., 0., 1.], [0., 1., 2.], [-1., 1., 0.]])
+    weights = tf.constant([[1., 2., 3.], [4., 5., 6.], [1., 1., 1.]])
+
+    default_metric, = metrics_lib.default_keras_metrics()
+    default_metric.update_state(labels, scores, weights)
+    default_metric.update_state(labels[:2], scores[:2])
+    results = default_metric.result()
+
+    independent_metrics = [
+        metrics_lib.get('ndcg', name='metric/ndcg_{}'.format(topn), topn=topn)
+        for topn in [1, 3, 5, 10]
+    ] + [
+        metrics_lib.get(key, name='metric/{}'.format(key)) for key in
+        ['arp', 'ordered_pair_accuracy', 'mrr', 'precision', 'map', 'dcg',
+         'ndcg']
+    ]
+    for metric in independent_metrics:
+      metric.update_state(labels, scores, weights)
+      metric.update_state(labels[:2], scores[:2])
+      self.assertAlmostEqual(results[metric.name].numpy(),
+                             metric.result().numpy(), places=5)
+
+    default_metric.reset_state()
+    for value in default_metric.result().values():
+      self.assertEqual(value.numpy(), 0.)
+
+  def test_packed_metrics_with_cutoffs_share_top_sort(self):
+    scores = tf.constant([[1., 3., 2., 5.], [1., 2., 3., 0.], [3., 1., 2., 4.]])
+    labels = tf.constant([[0., 0., 1., 1.], [0., 1., 2., 0.], [1., 1., 0., 2.]])
+
+    metrics = [
+        metrics_lib.NDCGMetric(name='ndcg', topn=1),
+        metrics_lib.MRRMetric(name='mrr', topn=3),
+        metrics_lib.PrecisionMetric(name='precision', topn=2),
+        metrics_lib.OPAMetric(name='opa'),
+    ]
+    packed_metric = metrics_lib._PackedRankingMetricBundle(metrics)
+    # The sort is shared and truncated to the largest cutoff of the metrics.
+    self.assertEqual(metrics[0]._sort_coordinator._topn, 3)
+    packed_metric.update_state(labels, scores)
+    results = packed_metric.result()
+
+    for metric in metrics:
+      independent_metric = metric.__class__.from_config(metric.get_config())
+      independent_metric.update_state(labels, scores)
+      self.assertAlmostEqual(results[metric.name].numpy(),
+                             independent_metric.result().numpy(), places=5)
+
+  def test_metrics_with_training_mode_callback(self):
+    scores = [[1., 3., 2.], [1., 2., 3.]]
+    labels = [[0., 0., 1.], [0., 1., 2.]]
+    eval_metric = metrics_lib.NDCGMetric(compute_on_train=False)
+    train_metric = metrics_lib.NDCGMetric()
+    default_metric, = metrics_lib.default_keras_metrics()
+    callback = metrics_lib.TrainingModeCallback(
+        [eval_metric, train_metric, default_metric])
+
+    callback.on_train_begin()
+    for metric in [eval_metric, train_metric, default_metric]:
+      metric.update_state(labels, scores)
+    self.assertEqual(eval_metric.result().numpy(), 0.)
+    self.assertGreater(train_metric.result().numpy(), 0.)
+    results = default_metric.result()
+    # The skipped metrics are left out of the results in training.
+    self.assertNotIn('metric/ndcg', results)
+    self.assertNotIn('metric/map', results)
+    self.assertGreater(results['metric/mrr'].numpy(), 0.)
+
+    callback.on_test_begin()
+    eval_metric.update_state(labels, scores)
+    default_metric.update_state(labels, scores)
+    self.assertAlmostEqual(eval_metric.result().numpy(),
+                           train_metric.result().numpy(), places=5)
+    self.assertGreater(default_metric.result()['metric/ndcg'].numpy(), 0.)
+
+    callback.on_test_end()
+    callback.on_train_end()
+    eval_metric.update_state(labels, scores)
+    self.assertAlmostEqual(eval_metric.result().numpy(),
+                           train_metric.result().numpy(), places=5)
+
+  def test_default_keras_metrics_are_serializable(self):
+    default_metric, = metrics_lib.default_keras_metrics()
+    serialized = tf.keras.utils.serialize_keras_object(default_metric)
+    deserialized = tf.keras.utils.deserialize_keras_object(serialized)
+    self.assertEqual(default_metric.get_config(), deserialized.get_config())
+
+    y_true = tf.constant([[0., 0., 1.]])
+    y_pred = tf.constant([[3., 1., 2.]])
+    default_metric.update_state(y_true, y_pred)
+    deserialized.update_state(y_true, y_pred)
+    self.assertAllClose(default_metric.result(), deserialized.result())
 
 
 class GetMetricsTest(tf.test.TestCase):
@@ -1383,6 +1679,14 @@ class GetMetricsTest(tf.test.TestCase):
                           ]) / num_queries
     self.assertAlmostEqual(metric_.result().numpy(), expected_result, places=5)
 
+  def test_get_should_return_new_metrics(self):
+    metric_1 = metrics_lib.get('ndcg', name='metric', topn=1)
+    metric_2 = metrics_lib.get('ndcg', name='metric', topn=1)
+    self.assertIsNot(metric_1, metric_2)
+
+    metric_1.update_state([[0., 1.]], [[1., 2.]])
+    self.assertEqual(metric_2.result().numpy(), 0.)
+
   def test_get_metric_error(self):
     with self.assertRaisesRegexp(ValueError, 'Input `key` needs to be string.'):
       metrics_lib.get(1, name='metric')
@@ -14,6 +14,7 @@
 
 """Utils for tfr.keras."""
 
+import math
 from typing import Callable
 
 import tensorflow as tf
@@ -68,7 +69,10 @@ def pow_minus_1(label: TensorLike) -> tf.Tensor:
   Returns:
     A `Tensor` that has each input element transformed as `x` to `2**x - 1`.
   """
-  return tf.math.pow(2., label) - 1.
+  # `expm1(x * log(2))` takes a single transcendental op instead of the two of
+  # `pow`.
+  label = tf.convert_to_tensor(label)
+  return tf.math.expm1(label * math.log(2.))
 
 
 @tf.keras.utils.register_keras_serializable(package="tensorflow_ranking")
@@ -84,7 +88,7 @@ def log2_inverse(rank: TensorLike) -> tf.Tensor:
   Returns:
     A `Tensor` that has each input element transformed as `x` to `1./log2(1+x)`.
   """
-  return tf.math.divide_no_nan(tf.math.log(2.), tf.math.log1p(rank))
+  return tf.math.divide_no_nan(math.log(2.), tf.math.log1p(rank))
 
 
 @tf.keras.utils.register_keras_serializable(package="tensorflow_ranking")
@@ -24,6 +24,7 @@ from __future__ import division
 from __future__ import print_function
 
 import inspect
+import math
 import tensorflow as tf
 
 from tensorflow_ranking.python import metrics_impl
@@ -31,7 +32,7 @@ from tensorflow_ranking.python import utils
 
 _DEFAULT_GAIN_FN = lambda label: tf.pow(2.0, label) - 1
 
-_DEFAULT_RANK_DISCOUNT_FN = lambda rank: tf.math.log(2.) / tf.math.log1p(rank)
+_DEFAULT_RANK_DISCOUNT_FN = lambda rank: math.log(2.) / tf.math.log1p(rank)
 
 
 class RankingMetricKey(object):
@@ -23,14 +23,20 @@ from __future__ import print_function
 
 import abc
 import functools
+import math
 import six
 import tensorflow as tf
 
 from tensorflow_ranking.python import utils
 
-_DEFAULT_GAIN_FN = lambda label: tf.pow(2.0, label) - 1
+# A Python float rather than `tf.math.log(2.)`, so that no op is added to
+# compute it on every call and it takes the dtype of the other operand.
+_LOG2 = math.log(2.)
 
-_DEFAULT_RANK_DISCOUNT_FN = lambda rank: tf.math.log(2.) / tf.math.log1p(rank)
+# `2**label - 1` computed with a single `expm1` instead of `pow`.
+_DEFAULT_GAIN_FN = lambda label: tf.math.expm1(label * _LOG2)
+
+_DEFAULT_RANK_DISCOUNT_FN = lambda rank: _LOG2 / tf.math.log1p(rank)
 
 
 def _alpha_dcg_gain_fn(labels, alpha):
@@ -151,7 +157,133 @@ def _discounted_cumulative_gain(labels,
       input_tensor=weights * gain * discount, axis=1, keepdims=True)
 
 
-def _per_list_recall(labels, predictions, topn, mask):
+def _ideal_discounted_cumulative_gain_from_label_counts(
+    labels, weights, mask, topn, max_label, gain_fn, rank_discount_fn):
+  """Computes the ideal DCG from the number of items of each label value.
+
+  In the ideal ranking, the items of label `v` take the ranks right after the
+  items with larger labels. The ideal DCG is thus the sum over the label values
+  of `gain(v)` times the discounts of these ranks, which are read from the
+  cumulative sum of the discounts instead of sorting the items.
+
+  This requires integer labels in [0, max_label], a non-decreasing `gain_fn`
+  and the same weight for all valid items of a list.
+
+  Args:
+    labels: The relevance `Tensor` of shape [batch_size, list_size].
+    weights: A `Tensor` of the same shape as labels.
+    mask: A boolean `Tensor` of the same shape as labels for the valid items.
+    topn: A cutoff for how many examples to consider for this metric.
+    max_label: An int as the largest label value.
+    gain_fn: (function) Transforms labels.
+    rank_discount_fn: (function) The rank discount function.
+
+  Returns:
+    A `Tensor` of shape [batch_size, 1] with the weighted ideal DCG per-list.
+  """
+  num_ranks = tf.minimum(tf.shape(input=labels)[1], topn)
+  # The number of valid items per label value, from the largest to the smallest.
+  # Counting with `one_hot` instead of `bincount` also compiles with XLA.
+  label_values = tf.one_hot(
+      max_label - tf.cast(labels, dtype=tf.int32), max_label + 1,
+      dtype=tf.int32)
+  counts = tf.reduce_sum(
+      input_tensor=label_values * tf.expand_dims(
+          tf.cast(mask, dtype=tf.int32), 2),
+      axis=1)
+  # The ranks (start, end] of the items of each label value in the ideal order.
+  end = tf.minimum(tf.cumsum(counts, axis=1), num_ranks)
+  start = tf.minimum(tf.cumsum(counts, axis=1, exclusive=True), num_ranks)
+  discount = rank_discount_fn(
+      tf.cast(tf.range(1, num_ranks + 1), dtype=tf.float32))
+  cum_discount = tf.concat([[0.], tf.cumsum(discount)], axis=0)
+  gain = gain_fn(tf.cast(tf.range(max_label, -1, -1), dtype=tf.float32))
+  ideal_dcg = tf.reduce_sum(
+      input_tensor=gain *
+      (tf.gather(cum_discount, end) - tf.gather(cum_discount, start)),
+      axis=1,
+      keepdims=True)
+  list_weights = tf.reduce_max(
+      input_tensor=tf.compat.v1.where(mask, weights, tf.zeros_like(weights)),
+      axis=1,
+      keepdims=True)
+  return list_weights * ideal_dcg
+
+
+def _has_uniform_list_weights(weights, mask):
+  """Returns whether all valid items of each list have the same weight."""
+  max_weights = tf.reduce_max(
+      input_tensor=tf.compat.v1.where(mask, weights, tf.zeros_like(weights)),
+      axis=1,
+      keepdims=True)
+  return tf.reduce_all(
+      tf.logical_or(tf.logical_not(mask), tf.equal(weights, max_weights)))
+
+
+def _discounted_cumulative_gain_at_cutoffs(
+    labels,
+    weights,
+    topns,
+    gain_fn=_DEFAULT_GAIN_FN,
+    rank_discount_fn=_DEFAULT_RANK_DISCOUNT_FN):
+  """Computes discounted cumulative gain (DCG) at multiple cutoffs.
+
+  The DCG at cutoff k is the k-th prefix sum of the discounted gains, so all
+  cutoffs are read from a single cumulative sum.
+
+  Args:
+    labels: The relevance `Tensor` of shape [batch_size, list_size], sorted in
+      ranking order.
+    weights: A `Tensor` of the same shape as labels or [batch_size, 1]. The
+      former case is per-example and the latter case is per-list.
+    topns: A list of cutoffs. A cutoff of None stands for the whole list.
+    gain_fn: (function) Transforms labels.
+    rank_discount_fn: (function) The rank discount function.
+
+  Returns:
+    A `Tensor` of shape [batch_size, len(topns)] with the weighted DCG per-list
+    at each cutoff.
+  """
+  list_size = tf.shape(input=labels)[1]
+  position = tf.cast(tf.range(1, list_size + 1), dtype=tf.float32)
+  gain = gain_fn(tf.cast(labels, dtype=tf.float32))
+  discount = rank_discount_fn(position)
+  cum_dcg = tf.cumsum(weights * gain * discount, axis=1)
+  cutoffs = tf.stack([
+      list_size if topn is None else tf.minimum(topn, list_size)
+      for topn in topns
+  ])
+  return tf.gather(cum_dcg, cutoffs - 1, axis=1)
+
+
+def _sort_by_scores(predictions, features_list, topn, mask,
+                    sorted_indices=None):
+  """Sorts `features_list` by `predictions`, reusing `sorted_indices` if given.
+
+  Args:
+    predictions: A `Tensor` with shape [batch_size, list_size]. Each value is
+      the ranking score of the corresponding example.
+    features_list: A list of `Tensor`s to be sorted.
+    topn: A cutoff for how many examples to keep in the sorted list.
+    mask: A `Tensor` of the same shape as predictions indicating which entries
+      are valid for computing the metric.
+    sorted_indices: An optional int `Tensor` of shape [batch_size, list_size]
+      with the indices of the examples sorted by `predictions` and `mask`, see
+      `_RankingMetric.sorted_indices`.
+
+  Returns:
+    A list of `Tensor`s as the list of sorted features by `predictions`.
+  """
+  if sorted_indices is None:
+    return utils.sort_by_scores(predictions, features_list, topn=topn,
+                                mask=mask)
+  topn_indices = sorted_indices[:, :topn]
+  return [
+      tf.gather(f, topn_indices, batch_dims=1, axis=1) for f in features_list
+  ]
+
+
+def _per_list_recall(labels, predictions, topn, mask, sorted_indices=None):
   """Computes the recall@k for each query in the batch.
 
   Args:
@@ -161,13 +293,15 @@ def _per_list_recall(labels, predictions, topn, mask):
       the ranking score of the corresponding example.
     topn: A cutoff for how many examples to consider for this metric.
     mask: A mask indicating which entries are valid for computing the metric.
+    sorted_indices: An optional `Tensor` of sorted indices, see
+      `_sort_by_scores`.
 
   Returns:
     A `Tensor` of size [batch_size, 1] containing the precision of each query
     respectively.
   """
-  sorted_labels = utils.sort_by_scores(predictions, [labels], topn=topn,
-                                       mask=mask)[0]
+  sorted_labels = _sort_by_scores(predictions, [labels], topn, mask,
+                                  sorted_indices)[0]
   topn_positives = tf.cast(
       tf.greater_equal(sorted_labels, 1.0), dtype=tf.float32)
   labels = tf.cast(tf.greater_equal(labels, 1.0), dtype=tf.float32)
@@ -177,7 +311,7 @@ def _per_list_recall(labels, predictions, topn, mask):
   return per_list_recall
 
 
-def _per_list_precision(labels, predictions, topn, mask):
+def _per_list_precision(labels, predictions, topn, mask, sorted_indices=None):
   """Computes the precision for each query in the batch.
 
   Args:
@@ -188,15 +322,17 @@ def _per_list_precision(labels, predictions, topn, mask):
     topn: A cutoff for how many examples to consider for this metric.
     mask: A `Tensor` of the same shape as predictions indicating which entries
       are valid for computing the metric.
+    sorted_indices: An optional `Tensor` of sorted indices, see
+      `_sort_by_scores`.
 
   Returns:
     A `Tensor` of size [batch_size, 1] containing the precision of each query
     respectively.
   """
-  sorted_labels = utils.sort_by_scores(predictions, [labels], topn=topn,
-                                       mask=mask)[0]
+  sorted_labels = _sort_by_scores(predictions, [labels], topn, mask,
+                                  sorted_indices)[0]
   # Relevance = 1.0 when labels >= 1.0.
-  relevance = tf.cast(tf.greater_equal(sorted_labels, 1.0), dtype=tf.float32)
+  relevance = tf.cast(tf.greater_equal(sorted_labels, 1), dtype=tf.float32)
   if topn is None:
     topn = tf.shape(relevance)[1]
   valid_topn = tf.minimum(
@@ -249,7 +385,9 @@ class _RankingMetric(six.with_metaclass(abc.ABCMeta, object)):
     labels = tf.convert_to_tensor(value=labels)
     predictions = tf.convert_to_tensor(value=predictions)
     weights = 1.0 if weights is None else tf.convert_to_tensor(value=weights)
-    example_weights = tf.ones_like(labels) * weights
+    # Integer labels, e.g. binary relevance in `tf.int8`, get float weights.
+    weights_dtype = labels.dtype if labels.dtype.is_floating else tf.float32
+    example_weights = tf.ones_like(labels, dtype=weights_dtype) * weights
     predictions.get_shape().assert_is_compatible_with(
         example_weights.get_shape())
     predictions.get_shape().assert_is_compatible_with(labels.get_shape())
@@ -265,7 +403,48 @@ class _RankingMetric(six.with_metaclass(abc.ABCMeta, object)):
         tf.reduce_min(input_tensor=predictions, axis=1, keepdims=True))
     return labels, predictions, example_weights, mask
 
-  def compute(self, labels, predictions, weights=None, mask=None):
+  def sorted_indices(self,
+                     labels,
+                     predictions,
+                     weights=None,
+                     mask=None,
+                     topn=None):
+    """Returns the indices of the examples sorted as in `compute`.
+
+    The result can be passed to `compute` of every metric constructed with the
+    same `ragged` for the same inputs and with a cutoff of at most `topn`, so
+    that they share a single sort.
+
+    Args:
+      labels: A `Tensor` of the same shape as `predictions` representing
+        relevance.
+      predictions: A `Tensor` with shape [batch_size, list_size]. Each value is
+        the ranking score of the corresponding example.
+      weights: An optional `Tensor` of the same shape of predictions or
+        [batch_size, 1]. The former case is per-example and the latter case is
+        per-list.
+      mask: An optional `Tensor` of the same shape as predictions indicating
+        which entries are valid for computing the metric. Will be ignored if
+        the metric was constructed with ragged=True.
+      topn: An optional cutoff of the sorted examples. Only the top examples are
+        sorted if set.
+
+    Returns:
+      An int `Tensor` of shape [batch_size, min(topn, list_size)].
+    """
+    if self._ragged:
+      labels, predictions, weights, mask = utils.ragged_to_dense(
+          labels, predictions, weights)
+    _, predictions, _, mask = self._prepare_and_validate_params(
+        labels, predictions, weights, mask)
+    return utils.sorted_indices(predictions, topn=topn, mask=mask)
+
+  def compute(self,
+              labels,
+              predictions,
+              weights=None,
+              mask=None,
+              sorted_indices=None):
     """Computes the metric with the given inputs.
 
     Args:
@@ -279,6 +458,8 @@ class _RankingMetric(six.with_metaclass(abc.ABCMeta, object)):
       mask: An optional `Tensor` of the same shape as predictions indicating
         which entries are valid for computing the metric. Will be ignored if
         the metric was constructed with ragged=True.
+      sorted_indices: An optional int `Tensor` returned by `sorted_indices` for
+        the same inputs. If given, it is used instead of sorting `predictions`.
 
     Returns:
       A tf metric.
@@ -288,10 +469,12 @@ class _RankingMetric(six.with_metaclass(abc.ABCMeta, object)):
           labels, predictions, weights)
     labels, predictions, weights, mask = self._prepare_and_validate_params(
         labels, predictions, weights, mask)
-    return self._compute_impl(labels, predictions, weights, mask)
+    return self._compute_impl(labels, predictions, weights, mask,
+                              sorted_indices)
 
   @abc.abstractmethod
-  def _compute_impl(self, labels, predictions, weights, mask):
+  def _compute_impl(self, labels, predictions, weights, mask,
+                    sorted_indices=None):
     """Computes the metric with the given inputs.
 
     Args:
@@ -303,6 +486,8 @@ class _RankingMetric(six.with_metaclass(abc.ABCMeta, object)):
         The former case is per-example and the latter case is per-list.
       mask: A `Tensor` of the same shape as predictions indicating which entries
         are valid for computing the metric.
+      sorted_indices: An optional int `Tensor` of shape [batch_size, list_size]
+        with the indices of the examples sorted by `predictions`.
 
     Returns:
       A tf metric.
@@ -403,7 +588,8 @@ class _DivRankingMetric(_RankingMetric):
             tf.reduce_any(tf.greater_equal(labels, 1.0), axis=-1),
             dtype=tf.float32))
 
-  def _compute_impl(self, labels, predictions, weights, mask):
+  def _compute_impl(self, labels, predictions, weights, mask,
+                    sorted_indices=None):
     """Computes the metric and per list weight with the given inputs.
 
     Args:
@@ -415,6 +601,7 @@ class _DivRankingMetric(_RankingMetric):
         The former case is per-example and the latter case is per-list.
       mask: An optional `Tensor` of the same shape as predictions indicating
         which entries are valid for computing the metric.
+      sorted_indices: Not supported by diversity metrics and ignored.
 
     Returns:
       A per-list metric and a per-list weights.
@@ -440,14 +627,15 @@ class MRRMetric(_RankingMetric):
     """The metric name."""
     return self._name
 
-  def _compute_impl(self, labels, predictions, weights, mask):
+  def _compute_impl(self, labels, predictions, weights, mask,
+                    sorted_indices=None):
     """See `_RankingMetric`."""
     topn = tf.shape(predictions)[1] if self._topn is None else self._topn
-    sorted_labels, = utils.sort_by_scores(predictions, [labels], topn=topn,
-                                          mask=mask)
+    sorted_labels, = _sort_by_scores(predictions, [labels], topn, mask,
+                                     sorted_indices)
     sorted_list_size = tf.shape(input=sorted_labels)[1]
     # Relevance = 1.0 when labels >= 1.0 to accommodate graded relevance.
-    relevance = tf.cast(tf.greater_equal(sorted_labels, 1.0), dtype=tf.float32)
+    relevance = tf.cast(tf.greater_equal(sorted_labels, 1), dtype=tf.float32)
     reciprocal_rank = 1.0 / tf.cast(
         tf.range(1, sorted_list_size + 1), dtype=tf.float32)
     # MRR has a shape of [batch_size, 1].
@@ -455,7 +643,7 @@ class MRRMetric(_RankingMetric):
         input_tensor=relevance * reciprocal_rank, axis=1, keepdims=True)
     per_list_weights = _per_example_weights_to_per_list_weights(
         weights=weights,
-        relevance=tf.cast(tf.greater_equal(labels, 1.0), dtype=tf.float32))
+        relevance=tf.cast(tf.greater_equal(labels, 1), dtype=tf.float32))
     return mrr, per_list_weights
 
 
@@ -491,11 +679,12 @@ class HitsMetric(_RankingMetric):
     """The metric name."""
     return self._name
 
-  def _compute_impl(self, labels, predictions, weights, mask):
+  def _compute_impl(self, labels, predictions, weights, mask,
+                    sorted_indices=None):
     """See `_RankingMetric`."""
     topn = tf.shape(predictions)[1] if self._topn is None else self._topn
-    sorted_labels, = utils.sort_by_scores(predictions, [labels], topn=topn,
-                                          mask=mask)
+    sorted_labels, = _sort_by_scores(predictions, [labels], topn, mask,
+                                     sorted_indices)
     # Relevance = 1.0 when labels >= 1.0 to accommodate graded relevance.
     relevance = tf.cast(tf.greater_equal(sorted_labels, 1.0), dtype=tf.float32)
     # Hits has a shape of [batch_size, 1].
@@ -519,11 +708,12 @@ class ARPMetric(_RankingMetric):
     """The metric name."""
     return self._name
 
-  def _compute_impl(self, labels, predictions, weights, mask):
+  def _compute_impl(self, labels, predictions, weights, mask,
+                    sorted_indices=None):
     """See `_RankingMetric`."""
     topn = tf.shape(predictions)[1]
-    sorted_labels, sorted_weights = utils.sort_by_scores(
-        predictions, [labels, weights], topn=topn, mask=mask)
+    sorted_labels, sorted_weights = _sort_by_scores(
+        predictions, [labels, weights], topn, mask, sorted_indices)
     weighted_labels = sorted_labels * sorted_weights
     position = (tf.cast(tf.range(1, topn + 1), dtype=tf.float32) *
                 tf.ones_like(weighted_labels))
@@ -550,10 +740,12 @@ class RecallMetric(_RankingMetric):
     """The metric name."""
     return self._name
 
-  def _compute_impl(self, labels, predictions, weights, mask):
+  def _compute_impl(self, labels, predictions, weights, mask,
+                    sorted_indices=None):
     """See `_RankingMetric`."""
     topn = tf.shape(predictions)[1] if self._topn is None else self._topn
-    per_list_recall = _per_list_recall(labels, predictions, topn, mask)
+    per_list_recall = _per_list_recall(labels, predictions, topn, mask,
+                                       sorted_indices)
     # per_list_weights are computed from the whole list to avoid the problem of
     # 0 when there is no relevant example in topn.
     per_list_weights = _per_example_weights_to_per_list_weights(
@@ -575,14 +767,16 @@ class PrecisionMetric(_RankingMetric):
     """The metric name."""
     return self._name
 
-  def _compute_impl(self, labels, predictions, weights, mask):
+  def _compute_impl(self, labels, predictions, weights, mask,
+                    sorted_indices=None):
     """See `_RankingMetric`."""
     topn = tf.shape(predictions)[1] if self._topn is None else self._topn
-    per_list_precision = _per_list_precision(labels, predictions, topn, mask)
+    per_list_precision = _per_list_precision(labels, predictions, topn, mask,
+                                             sorted_indices)
     # per_list_weights are computed from the whole list to avoid the problem of
     # 0 when there is no relevant example in topn.
     per_list_weights = _per_example_weights_to_per_list_weights(
-        weights, tf.cast(tf.greater_equal(labels, 1.0), dtype=tf.float32))
+        weights, tf.cast(tf.greater_equal(labels, 1), dtype=tf.float32))
     return per_list_precision, per_list_weights
 
 
@@ -600,13 +794,14 @@ class MeanAveragePrecisionMetric(_RankingMetric):
     """The metric name."""
     return self._name
 
-  def _compute_impl(self, labels, predictions, weights, mask):
+  def _compute_impl(self, labels, predictions, weights, mask,
+                    sorted_indices=None):
     """See `_RankingMetric`."""
     topn = tf.shape(predictions)[1] if self._topn is None else self._topn
     # Relevance = 1.0 when labels >= 1.0.
     relevance = tf.cast(tf.greater_equal(labels, 1.0), dtype=tf.float32)
-    sorted_relevance, sorted_weights = utils.sort_by_scores(
-        predictions, [relevance, weights], topn=topn, mask=mask)
+    sorted_relevance, sorted_weights = _sort_by_scores(
+        predictions, [relevance, weights], topn, mask, sorted_indices)
     per_list_relevant_counts = tf.cumsum(sorted_relevance, axis=1)
     per_list_cutoffs = tf.cumsum(tf.ones_like(sorted_relevance), axis=1)
     per_list_precisions = tf.math.divide_no_nan(per_list_relevant_counts,
@@ -629,44 +824,119 @@ class MeanAveragePrecisionMetric(_RankingMetric):
 
 
 class NDCGMetric(_RankingMetric):
-  """Implements normalized discounted cumulative gain (NDCG)."""
+  """Implements normalized discounted cumulative gain (NDCG).
+
+  If `max_label` is set, the labels need to be integers in [0, max_label] and
+  `gain_fn` needs to be non-decreasing. The ideal DCG is then computed from the
+  number of items of each label value instead of sorting the items, unless the
+  items of a list have different weights.
+  """
 
   def __init__(self,
                name,
                topn,
                gain_fn=_DEFAULT_GAIN_FN,
                rank_discount_fn=_DEFAULT_RANK_DISCOUNT_FN,
-               ragged=False):
+               ragged=False,
+               max_label=None):
     """Constructor."""
     super(NDCGMetric, self).__init__(ragged=ragged)
     self._name = name
     self._topn = topn
     self._gain_fn = gain_fn
     self._rank_discount_fn = rank_discount_fn
+    self._max_label = max_label
 
   @property
   def name(self):
     """The metric name."""
     return self._name
 
-  def _compute_impl(self, labels, predictions, weights, mask):
+  def _compute_impl(self, labels, predictions, weights, mask,
+                    sorted_indices=None):
     """See `_RankingMetric`."""
     topn = tf.shape(predictions)[1] if self._topn is None else self._topn
-    sorted_labels, sorted_weights = utils.sort_by_scores(
-        predictions, [labels, weights], topn=topn, mask=mask)
+    sorted_labels, sorted_weights = _sort_by_scores(
+        predictions, [labels, weights], topn, mask, sorted_indices)
     dcg = _discounted_cumulative_gain(sorted_labels, sorted_weights,
                                       self._gain_fn, self._rank_discount_fn)
+    # The gains of the labels are shared by the ideal ranking and the per-list
+    # weights.
+    gains = self._gain_fn(tf.cast(labels, dtype=tf.float32))
+
+    def sorted_ideal_dcg():
+      # Sorting over the weighted gains to get ideal ranking.
+      weighted_gains = weights * gains
+      ideal_sorted_labels, ideal_sorted_weights = utils.sort_by_scores(
+          weighted_gains, [labels, weights], topn=topn, mask=mask)
+      return _discounted_cumulative_gain(ideal_sorted_labels,
+                                         ideal_sorted_weights, self._gain_fn,
+                                         self._rank_discount_fn)
+
+    if self._max_label is None:
+      ideal_dcg = sorted_ideal_dcg()
+    else:
+      label_counts_ideal_dcg = functools.partial(
+          _ideal_discounted_cumulative_gain_from_label_counts, labels, weights,
+          mask, topn, self._max_label, self._gain_fn, self._rank_discount_fn)
+      ideal_dcg = tf.cond(
+          _has_uniform_list_weights(weights, mask), label_counts_ideal_dcg,
+          sorted_ideal_dcg)
+    per_list_ndcg = tf.compat.v1.math.divide_no_nan(dcg, ideal_dcg)
+    per_list_weights = _per_example_weights_to_per_list_weights(
+        weights=weights, relevance=gains)
+    return per_list_ndcg, per_list_weights
+
+
+class MultiCutoffNDCGMetric(_RankingMetric):
+  """Implements NDCG at multiple cutoffs from a single sort."""
+
+  def __init__(self,
+               name,
+               topns,
+               gain_fn=_DEFAULT_GAIN_FN,
+               rank_discount_fn=_DEFAULT_RANK_DISCOUNT_FN,
+               ragged=False):
+    """Constructor."""
+    super(MultiCutoffNDCGMetric, self).__init__(ragged=ragged)
+    self._name = name
+    self._topns = topns
+    self._gain_fn = gain_fn
+    self._rank_discount_fn = rank_discount_fn
+
+  @property
+  def name(self):
+    """The metric name."""
+    return self._name
+
+  def _compute_impl(self, labels, predictions, weights, mask,
+                    sorted_indices=None):
+    """See `_RankingMetric`.
+
+    Returns:
+      A per-list metric of shape [batch_size, len(topns)] and per-list weights
+      of shape [batch_size, 1].
+    """
+    if None in self._topns:
+      topn = tf.shape(predictions)[1]
+    else:
+      topn = max(self._topns)
+    sorted_labels, sorted_weights = _sort_by_scores(
+        predictions, [labels, weights], topn, mask, sorted_indices)
+    dcg = _discounted_cumulative_gain_at_cutoffs(sorted_labels, sorted_weights,
+                                                 self._topns, self._gain_fn,
+                                                 self._rank_discount_fn)
+    gains = self._gain_fn(tf.cast(labels, dtype=tf.float32))
     # Sorting over the weighted gains to get ideal ranking.
-    weighted_gains = weights * self._gain_fn(tf.cast(labels, dtype=tf.float32))
+    weighted_gains = weights * gains
     ideal_sorted_labels, ideal_sorted_weights = utils.sort_by_scores(
         weighted_gains, [labels, weights], topn=topn, mask=mask)
-    ideal_dcg = _discounted_cumulative_gain(ideal_sorted_labels,
-                                            ideal_sorted_weights, self._gain_fn,
-                                            self._rank_discount_fn)
+    ideal_dcg = _discounted_cumulative_gain_at_cutoffs(
+        ideal_sorted_labels, ideal_sorted_weights, self._topns, self._gain_fn,
+        self._rank_discount_fn)
     per_list_ndcg = tf.compat.v1.math.divide_no_nan(dcg, ideal_dcg)
     per_list_weights = _per_example_weights_to_per_list_weights(
-        weights=weights,
-        relevance=self._gain_fn(tf.cast(labels, dtype=tf.float32)))
+        weights=weights, relevance=gains)
     return per_list_ndcg, per_list_weights
 
 
@@ -691,11 +961,12 @@ class DCGMetric(_RankingMetric):
     """The metric name."""
     return self._name
 
-  def _compute_impl(self, labels, predictions, weights, mask):
+  def _compute_impl(self, labels, predictions, weights, mask,
+                    sorted_indices=None):
     """See `_RankingMetric`."""
     topn = tf.shape(predictions)[1] if self._topn is None else self._topn
-    sorted_labels, sorted_weights = utils.sort_by_scores(
-        predictions, [labels, weights], topn=topn, mask=mask)
+    sorted_labels, sorted_weights = _sort_by_scores(
+        predictions, [labels, weights], topn, mask, sorted_indices)
     dcg = _discounted_cumulative_gain(sorted_labels, sorted_weights,
                                       self._gain_fn, self._rank_discount_fn)
     per_list_weights = _per_example_weights_to_per_list_weights(
@@ -718,7 +989,8 @@ class OPAMetric(_RankingMetric):
     """The metric name."""
     return self._name
 
-  def _compute_impl(self, labels, predictions, weights, mask):
+  def _compute_impl(self, labels, predictions, weights, mask,
+                    sorted_indices=None):
     """See `_RankingMetric`."""
     valid_pair = tf.logical_and(
         tf.expand_dims(mask, 2), tf.expand_dims(mask, 1))
@@ -866,7 +1138,8 @@ class BPrefMetric(_RankingMetric):
     """The metric name."""
     return self._name
 
-  def _compute_impl(self, labels, predictions, weights, mask):
+  def _compute_impl(self, labels, predictions, weights, mask,
+                    sorted_indices=None):
     """See `_RankingMetric`."""
     topn = tf.shape(predictions)[1] if self._topn is None else self._topn
 
@@ -877,8 +1150,8 @@ class BPrefMetric(_RankingMetric):
     total_relevance = tf.reduce_sum(relevance, axis=1, keepdims=True)
     total_irrelevance = tf.reduce_sum(irrelevance, axis=1, keepdims=True)
 
-    sorted_relevance, sorted_irrelevance = utils.sort_by_scores(
-        predictions, [relevance, irrelevance], mask=mask, topn=topn)
+    sorted_relevance, sorted_irrelevance = _sort_by_scores(
+        predictions, [relevance, irrelevance], topn, mask, sorted_indices)
 
     numerator = tf.minimum(
         tf.cumsum(sorted_irrelevance, axis=1), total_relevance)
@@ -838,6 +838,67 @@ class NDCGMetricTest(tf.test.TestCase):
     self.assertAllClose(output, [[0.0]])
     self.assertAllClose(output_weights, [[0.0]])
 
+  def test_ndcg_should_use_sorted_indices(self):
+    scores = [[1., 3., 2.], [4., 2., 1.]]
+    labels = [[1., 0., 2.], [0., 1., -1.]]
+
+    metric = metrics_impl.NDCGMetric(name=None, topn=2)
+    sorted_indices = metrics_impl.ARPMetric(name=None).sorted_indices(
+        labels, scores)
+    expected_output, expected_weights = metric.compute(labels, scores)
+    output, output_weights = metric.compute(
+        labels, scores, sorted_indices=sorted_indices)
+
+    self.assertAllEqual(sorted_indices, [[1, 2, 0], [0, 1, 2]])
+    self.assertAllClose(output, expected_output)
+    self.assertAllClose(output_weights, expected_weights)
+
+  def test_ndcg_with_max_label_should_match_sorted_ideal_dcg(self):
+    scores = [[1., 3., 2., 4.], [4., 2., 1., 3.]]
+    labels = [[1., 0., 2., 2.], [0., 3., -1., 1.]]
+
+    for weights in [None, [[2.], [1.]], [[1., 2., 3., 4.], [1., 1., 1., 1.]]]:
+      for topn in [None, 1, 2, 3]:
+        metric = metrics_impl.NDCGMetric(name=None, topn=topn)
+        max_label_metric = metrics_impl.NDCGMetric(
+            name=None, topn=topn, max_label=3)
+        expected_output, _ = metric.compute(labels, scores, weights)
+        output, _ = max_label_metric.compute(labels, scores, weights)
+        self.assertAllClose(output, expected_output)
+
+
+class MultiCutoffNDCGMetricTest(tf.test.TestCase):
+
+  def test_multi_cutoff_ndcg_should_be_one_value_per_cutoff(self):
+    scores = [[4., 3., 2., 1.]]
+    labels = [[0., 3., 1., 0.]]
+
+    metric = metrics_impl.MultiCutoffNDCGMetric(name=None, topns=[1, 2, None])
+    output, output_weights = metric.compute(labels, scores, None)
+
+    max_dcg = (2. ** 3. - 1.) / log2p1(1.) + 1. / log2p1(2.)
+    self.assertAllClose(output, [[
+        0.,
+        (2. ** 3. - 1.) / log2p1(2.) / max_dcg,
+        ((2. ** 3. - 1.) / log2p1(2.) + 1. / log2p1(3.)) / max_dcg,
+    ]])
+    self.assertAllClose(output_weights, [[1.]])
+
+  def test_multi_cutoff_ndcg_should_match_ndcg_with_cutoffs(self):
+    scores = [[1., 3., 2.], [1., 2., 3.], [3., 1., 2.]]
+    labels = [[0., 0., 1.], [0., 1., 2.], [0., 1., 0.]]
+    weights = [[1., 2., 3.], [4., 5., 6.], [1., 1., 1.]]
+    topns = [1, 2, 5, None]
+
+    metric = metrics_impl.MultiCutoffNDCGMetric(name=None, topns=topns)
+    output, output_weights = metric.compute(labels, scores, weights)
+
+    for i, topn in enumerate(topns):
+      ndcg = metrics_impl.NDCGMetric(name=None, topn=topn)
+      expected, expected_weights = ndcg.compute(labels, scores, weights)
+      self.assertAllClose(output[:, i:i + 1], expected)
+      self.assertAllClose(output_weights, expected_weights)
+
 
 class DCGMetricTest(tf.test.TestCase):
 
@@ -78,7 +78,7 @@ def gather_per_row(inputs, indices):
 def is_label_valid(labels):
   """Returns a boolean `Tensor` for label validity."""
   labels = tf.convert_to_tensor(value=labels)
-  return tf.greater_equal(labels, 0.)
+  return tf.greater_equal(labels, 0)
 
 
 def _get_shuffle_indices(shape, mask=None, shuffle_ties=True, seed=None):
@@ -112,20 +112,12 @@ def _get_shuffle_indices(shape, mask=None, shuffle_ties=True, seed=None):
   return tf.argsort(shuffle_values, stable=True)
 
 
-def sort_by_scores(scores,
-                   features_list,
-                   topn=None,
-                   shuffle_ties=True,
-                   seed=None,
-                   mask=None):
-  """Sorts list of features according to per-example scores.
+def sorted_indices(scores, topn=None, shuffle_ties=True, seed=None, mask=None):
+  """Returns the indices that sort the examples according to `scores`.
 
   Args:
     scores: A `Tensor` of shape [batch_size, list_size] representing the
       per-example scores.
-    features_list: A list of `Tensor`s to be sorted. The shape of the `Tensor`
-      can be [batch_size, list_size] or [batch_size, list_size, feature_dims].
-      The latter is applicable for example features.
     topn: An integer as the cutoff of examples in the sorted list.
     shuffle_ties: A boolean. If True, randomly shuffle before the sorting.
     seed: The ops-level random seed used when `shuffle_ties` is True.
@@ -134,10 +126,15 @@ def sort_by_scores(scores,
       end.
 
   Returns:
-    A list of `Tensor`s as the list of sorted features by `scores`.
+    An int32 `Tensor` of shape [batch_size, min(topn, list_size)] whose rows are
+    the indices of the examples in descending order of `scores`.
   """
-  with tf.compat.v1.name_scope(name='sort_by_scores'):
-    scores = tf.cast(scores, tf.float32)
+  with tf.compat.v1.name_scope(name='sorted_indices'):
+    scores = tf.convert_to_tensor(scores)
+    # Floating point scores are sorted in their own dtype, e.g. the `bfloat16`
+    # outputs of a mixed precision model.
+    if not scores.dtype.is_floating:
+      scores = tf.cast(scores, tf.float32)
     scores.get_shape().assert_has_rank(2)
     list_size = tf.shape(input=scores)[1]
     if topn is None:
@@ -157,10 +154,40 @@ def sort_by_scores(scores,
           tf.shape(input=scores), mask, shuffle_ties=shuffle_ties, seed=seed)
       scores = tf.gather(scores, shuffle_ind, batch_dims=1, axis=1)
 
-    # Perform sort and return sorted feature_list entries.
+    # Perform sort and map the indices back to the unshuffled entries.
     _, indices = tf.math.top_k(scores, topn, sorted=True)
     if shuffle_ind is not None:
       indices = tf.gather(shuffle_ind, indices, batch_dims=1, axis=1)
+    return indices
+
+
+def sort_by_scores(scores,
+                   features_list,
+                   topn=None,
+                   shuffle_ties=True,
+                   seed=None,
+                   mask=None):
+  """Sorts list of features according to per-example scores.
+
+  Args:
+    scores: A `Tensor` of shape [batch_size, list_size] representing the
+      per-example scores.
+    features_list: A list of `Tensor`s to be sorted. The shape of the `Tensor`
+      can be [batch_size, list_size] or [batch_size, list_size, feature_dims].
+      The latter is applicable for example features.
+    topn: An integer as the cutoff of examples in the sorted list.
+    shuffle_ties: A boolean. If True, randomly shuffle before the sorting.
+    seed: The ops-level random seed used when `shuffle_ties` is True.
+    mask: An optional `Tensor` of shape [batch_size, list_size] representing
+      which entries are valid for sorting. Invalid entries will be pushed to the
+      end.
+
+  Returns:
+    A list of `Tensor`s as the list of sorted features by `scores`.
+  """
+  with tf.compat.v1.name_scope(name='sort_by_scores'):
+    indices = sorted_indices(
+        scores, topn=topn, shuffle_ties=shuffle_ties, seed=seed, mask=mask)
     return [tf.gather(f, indices, batch_dims=1, axis=1) for f in features_list]
 
 
@@ -434,8 +461,8 @@ def ragged_to_dense(labels, predictions, weights):
     A tuple (labels, predictions, weights, mask) of dense `tf.Tensor`s.
   """
   # TODO: Add checks to validate (ragged) shapes of input tensors.
-  mask = tf.cast(tf.ones_like(labels).to_tensor(0.), dtype=tf.bool)
-  labels = labels.to_tensor(_PADDING_LABEL)
+  mask = tf.ones_like(labels, dtype=tf.bool).to_tensor(False)
+  labels = labels.to_tensor(tf.cast(_PADDING_LABEL, labels.dtype))
   if predictions is not None:
     predictions = predictions.to_tensor(_PADDING_PREDICTION)
   if isinstance(weights, tf.RaggedTensor):
@@ -141,6 +141,25 @@ class UtilsTest(tf.test.TestCase):
     sorted_names = result[0]
     self.assertAllEqual(sorted_names, [[b'c', b'a', b'd', b'e', b'b']])
 
+  def test_sorted_indices(self):
+    scores = [[1., 3., 2.], [1., 2., 3.]]
+    self.assertAllEqual(utils.sorted_indices(scores), [[1, 2, 0], [2, 1, 0]])
+    self.assertAllEqual(
+        utils.sorted_indices(scores, topn=2), [[1, 2], [2, 1]])
+    mask = [[True, False, True], [True, True, True]]
+    self.assertAllEqual(
+        utils.sorted_indices(scores, mask=mask, shuffle_ties=False),
+        [[2, 0, 1], [2, 1, 0]])
+
+  def test_sorted_indices_in_dtype_of_scores(self):
+    for dtype in [tf.bfloat16, tf.float16, tf.float64, tf.int32]:
+      scores = tf.constant([[1, 3, 2], [1, 2, 3]], dtype=dtype)
+      self.assertAllEqual(
+          utils.sorted_indices(scores), [[1, 2, 0], [2, 1, 0]])
+    # Scores that are only distinct in float64 are not tied.
+    scores = tf.constant([[1., 1. + 1e-12]], dtype=tf.float64)
+    self.assertAllEqual(utils.sorted_indices(scores), [[1, 0]])
+
   def test_sorted_ranks(self):
     scores = [[1., 3., 2.]]
     ranks = utils.sorted_ranks(scores, seed=1)